@@ -10,8 +10,62 @@ class Config:
     OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'gemma:2b')
     UPLOAD_FOLDER = 'static/downloads'
     OUTPUT_FOLDER = 'static/output'
+    CHECKPOINT_FOLDER = 'checkpoints' # Per-job stage manifests for crash recovery
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3')) # Starts (first run + resumes) before an interrupted job is marked failed
     FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe" # Explicit path to ffmpeg
+
+    MEDIA_WORKERS = int(os.getenv('MEDIA_WORKERS', '4')) # Concurrent Pexels searches/downloads
+    CLIP_TRIM_MARGIN = 1.0 # Extra seconds fetched beyond the narration length
+    CLIP_TRIM_RATIO = 0.8 # Only fetch a prefix if it is shorter than this share of the clip
+    CLIP_DOWNLOAD_TIMEOUT = int(os.getenv('CLIP_DOWNLOAD_TIMEOUT', '120')) # Wall-clock seconds per prefix download
+
+    # Web Search Context (news prompts)
+    SEARCH_TIMEOUT = float(os.getenv('SEARCH_TIMEOUT', '4')) # Max seconds a job waits for search
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '600'))
+    SEARCH_CACHE_MAX = int(os.getenv('SEARCH_CACHE_MAX', '256')) # Cached queries kept in memory
+    SEARCH_POPULARITY_MAX = int(os.getenv('SEARCH_POPULARITY_MAX', '500')) # Queries tracked for prefetching
+    SEARCH_PREFETCH_INTERVAL = int(os.getenv('SEARCH_PREFETCH_INTERVAL', '300')) # 0 disables
+    SEARCH_PREFETCH_TOP = int(os.getenv('SEARCH_PREFETCH_TOP', '5'))
+    SEARCH_PREFETCH_QUERIES = [q.strip() for q in os.getenv('SEARCH_PREFETCH_QUERIES', '').split(',') if q.strip()]
+
+    # Render Workers
+    RENDER_MODE = os.getenv('RENDER_MODE', 'thread') # 'thread' (in the web process) or 'queue' (worker.py)
+    JOB_QUEUE_BACKEND = os.getenv('JOB_QUEUE_BACKEND', 'sqlite') # or 'package.module:ClassName'
+    JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', 'jobs.db')
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1'))
+    JOB_HEARTBEAT_SECONDS = int(os.getenv('JOB_HEARTBEAT_SECONDS', '10'))
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '120')) # Jobs of silent workers are reclaimed after this
+
+    # Media Delivery
+    MEDIA_ROOT = 'static'
+    MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', '3600'))
+    ACCEL_REDIRECT_PREFIX = os.getenv('ACCEL_REDIRECT_PREFIX') # e.g. '/protected' (nginx internal location for MEDIA_ROOT)
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes') # Apache/lighttpd offload
     
-    # Ensure directories exist
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    # HLS Streaming (progressive preview while rendering)
+    HLS_ENABLED = os.getenv('HLS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    HLS_SEGMENT_SECONDS = int(os.getenv('HLS_SEGMENT_SECONDS', '4'))
+    HLS_SEGMENT_TYPE = os.getenv('HLS_SEGMENT_TYPE', 'mpegts') # 'mpegts' or 'fmp4'
+
+    # FFmpeg Execution
+    RENDER_SLOTS = int(os.getenv('RENDER_SLOTS', '2')) # Concurrent encodes
+    FFMPEG_THREADS = int(os.getenv('FFMPEG_THREADS', '0')) # 0 = cpu_count / RENDER_SLOTS
+    FFMPEG_NICE = int(os.getenv('FFMPEG_NICE', '10')) # POSIX only
+    FFMPEG_TIMEOUT = int(os.getenv('FFMPEG_TIMEOUT', '1800')) # Wall-clock seconds per encode
+
+    # Storage Lifecycle (background GC)
+    GC_INTERVAL = int(os.getenv('GC_INTERVAL', '600')) # Seconds between passes, 0 disables
+    GC_GRACE_SECONDS = int(os.getenv('GC_GRACE_SECONDS', '900')) # Never touch files newer than this
+    GC_LOCK_STALE_SECONDS = int(os.getenv('GC_LOCK_STALE_SECONDS', '3600')) # Lock of a crashed GC pass is taken over after this
+    DOWNLOADS_MAX_BYTES = int(os.getenv('DOWNLOADS_MAX_BYTES', str(5 * 1024 ** 3)))
+    DOWNLOADS_MAX_AGE = int(os.getenv('DOWNLOADS_MAX_AGE', str(7 * 24 * 3600)))
+    OUTPUT_MAX_BYTES = int(os.getenv('OUTPUT_MAX_BYTES', str(20 * 1024 ** 3)))
+    OUTPUT_MAX_AGE = int(os.getenv('OUTPUT_MAX_AGE', str(3 * 24 * 3600)))
+
+def ensure_directories():
+    """
+    Creates the working directories. Called by the entry points at startup
+    instead of as an import side effect.
+    """
+    for folder in (Config.UPLOAD_FOLDER, Config.OUTPUT_FOLDER, Config.CHECKPOINT_FOLDER):
+        os.makedirs(folder, exist_ok=True)
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+# Modules whose import cost we care about (heavy third-party providers + our services)
+HEAVY_MODULES = ['ffmpeg', 'edge_tts', 'groq', 'duckduckgo_search', 'PIL', 'moviepy', 'google.generativeai']
+TARGETS = [
+    'config',
+    'app',
+    'services.media_delivery',
+    'services.ffmpeg_runner',
+    'services.checkpoint',
+    'services.asset_lifecycle',
+    'services.search_engine',
+    'services.script_gen',
+    'services.media_source',
+    'services.tts',
+    'services.video_editor',
+    'services.thumbnail_generator',
+]
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def import_time_ms(module):
+    """
+    Cumulative import time of `module` in a fresh interpreter (python -X importtime).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+        return None, last_line
+
+    cumulative = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1])
+    return (cumulative / 1000 if cumulative is not None else None), None
+
+def heavy_modules_loaded_by(module):
+    """
+    Which heavy providers end up in sys.modules after importing `module`.
+    """
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return [m for m in result.stdout.strip().split(',') if m]
+
+print("Import-time profile (fresh interpreter per module)")
+print(f"{'module':<32} {'ms':>9}  heavy providers loaded")
+print("-" * 80)
+
+for target in TARGETS:
+    ms, error = import_time_ms(target)
+    if ms is None:
+        print(f"{target:<32} {'FAILED':>9}  {error}")
+        continue
+    heavy = heavy_modules_loaded_by(target)
+    print(f"{target:<32} {ms:>9.1f}  {', '.join(heavy) if heavy else '-'}")
@@ -0,0 +1,217 @@
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+try:
+    from config import Config
+except ImportError:
+    from ..config import Config
+
+from services import checkpoint
+
+# Leftovers from interrupted writes (thumbnail frames, partial downloads, checkpoint temp files)
+TEMP_SUFFIXES = ('.temp.png', '.tmp', '.tmp.mp4')
+
+_gc_thread = None
+_gc_lock = threading.Lock()
+
+def touch(path):
+    """
+    Marks a cached asset as just reused, so LRU eviction keeps it around.
+    """
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+def _norm(path):
+    return os.path.normcase(os.path.abspath(path))
+
+def _manifest_assets(manifest):
+    """
+    Every file/dir a job refers to: segment media + audio, outputs, dubs, HLS dir.
+    """
+    paths = []
+    for key in ('script', 'dub_script'):
+        for segment in manifest.get(key) or []:
+            paths.append(segment.get('image_path'))
+            paths.append(segment.get('audio_path'))
+    paths.append(manifest.get('output_path'))
+    paths.append(manifest.get('thumbnail_path'))
+    for dub in manifest.get('dubbed_versions') or []:
+        paths.append(dub.get('path'))
+    paths.append(os.path.join(Config.OUTPUT_FOLDER, f"{manifest['job_id']}_hls"))
+    return [_norm(p) for p in paths if p]
+
+def collect_references():
+    """
+    Reference counts from job manifests.
+    pinned: assets of jobs that are still running (never evicted)
+    reuse: how many jobs (finished or not) have used each asset
+    """
+    pinned = set()
+    reuse = Counter()
+    for manifest in checkpoint.list_all():
+        assets = _manifest_assets(manifest)
+        reuse.update(set(assets))
+        if manifest.get('status') not in checkpoint.FINAL_STATUSES:
+            pinned.update(assets)
+    return pinned, reuse
+
+def _entry_size(path):
+    if os.path.isdir(path):
+        total = 0
+        for root, dirs, files in os.walk(path):
+            for file in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    pass
+        return total
+    return os.path.getsize(path)
+
+def _scan(folder):
+    entries = []
+    if not os.path.isdir(folder):
+        return entries
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        try:
+            stat = os.stat(path)
+            entries.append({
+                'path': path,
+                'key': _norm(path),
+                'size': _entry_size(path),
+                'last_used': max(stat.st_mtime, stat.st_atime)
+            })
+        except OSError:
+            continue
+    return entries
+
+def _delete(path):
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except OSError as e:
+        print(f"GC could not delete {path}: {e}")
+        return False
+
+def collect_folder(folder, max_bytes, max_age, pinned, reuse):
+    """
+    Enforces the age and size quota on one folder. Eviction order:
+    temp leftovers, then anything past max_age, then least-reused / least-recently-used
+    until the folder fits in max_bytes. Assets of running jobs and files younger than
+    GC_GRACE_SECONDS (possibly still being written) are never touched.
+    """
+    now = time.time()
+    entries = _scan(folder)
+    total = sum(e['size'] for e in entries)
+    freed = 0
+
+    candidates = [
+        e for e in entries
+        if e['key'] not in pinned and now - e['last_used'] > Config.GC_GRACE_SECONDS
+    ]
+    candidates.sort(key=lambda e: (
+        not e['path'].endswith(TEMP_SUFFIXES),
+        now - e['last_used'] <= max_age,
+        reuse[e['key']],
+        e['last_used']
+    ))
+
+    for e in candidates:
+        expired = e['path'].endswith(TEMP_SUFFIXES) or now - e['last_used'] > max_age
+        if not expired and total <= max_bytes:
+            break
+        if _delete(e['path']):
+            total -= e['size']
+            freed += e['size']
+
+    return freed
+
+def _prune_checkpoints():
+    # Temp files left by a crash inside checkpoint.save
+    stale_before = time.time() - Config.GC_GRACE_SECONDS
+    for e in _scan(Config.CHECKPOINT_FOLDER):
+        if e['path'].endswith(TEMP_SUFFIXES) and e['last_used'] < stale_before:
+            _delete(e['path'])
+
+    # Finished manifests are only kept as long as their outputs would be
+    cutoff = time.time() - Config.OUTPUT_MAX_AGE
+    for manifest in checkpoint.list_all():
+        if manifest.get('status') in checkpoint.FINAL_STATUSES and manifest.get('updated_at', 0) < cutoff:
+            checkpoint.remove(manifest['job_id'])
+
+def _gc_lock_path():
+    return os.path.join(Config.CHECKPOINT_FOLDER, '.gc.lock')
+
+def _acquire_process_lock():
+    """
+    Cross-process lock (the web tier and every worker run GC over the same
+    folders). O_EXCL create is atomic; a lock older than GC_LOCK_STALE_SECONDS
+    belongs to a crashed process and is taken over.
+    """
+    path = _gc_lock_path()
+    os.makedirs(Config.CHECKPOINT_FOLDER, exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < Config.GC_LOCK_STALE_SECONDS:
+                    return False
+                os.remove(path)
+            except OSError:
+                return False
+    return False
+
+def _release_process_lock():
+    try:
+        os.remove(_gc_lock_path())
+    except OSError:
+        pass
+
+def run_gc():
+    """
+    One GC pass over downloads and outputs. Skipped if another process is
+    already collecting.
+    """
+    with _gc_lock:
+        if not _acquire_process_lock():
+            return 0
+        try:
+            pinned, reuse = collect_references()
+            freed = collect_folder(Config.UPLOAD_FOLDER, Config.DOWNLOADS_MAX_BYTES, Config.DOWNLOADS_MAX_AGE, pinned, reuse)
+            freed += collect_folder(Config.OUTPUT_FOLDER, Config.OUTPUT_MAX_BYTES, Config.OUTPUT_MAX_AGE, pinned, reuse)
+            _prune_checkpoints()
+        finally:
+            _release_process_lock()
+
+    if freed:
+        print(f"Storage GC freed {freed / (1024 * 1024):.1f} MB")
+    return freed
+
+def _gc_loop():
+    while True:
+        try:
+            run_gc()
+        except Exception as e:
+            print(f"Storage GC failed: {e}")
+        time.sleep(Config.GC_INTERVAL)
+
+def start_background_gc():
+    """
+    Runs GC periodically on a daemon thread, outside the request path.
+    """
+    global _gc_thread
+    if _gc_thread is None and Config.GC_INTERVAL > 0:
+        _gc_thread = threading.Thread(target=_gc_loop, daemon=True)
+        _gc_thread.start()
+    return _gc_thread
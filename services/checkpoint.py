@@ -0,0 +1,92 @@
+import os
+import json
+import time
+try:
+    from config import Config
+except ImportError:
+    from ..config import Config
+
+# Statuses after which a job is never resumed
+FINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+def _manifest_path(job_id):
+    return os.path.join(Config.CHECKPOINT_FOLDER, f"{job_id}.json")
+
+def save(manifest):
+    """
+    Atomically writes the manifest (write temp file, then rename over the old one),
+    so a crash mid-write never leaves a truncated checkpoint behind.
+    """
+    os.makedirs(Config.CHECKPOINT_FOLDER, exist_ok=True)
+    manifest['updated_at'] = time.time()
+    path = _manifest_path(manifest['job_id'])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def load(job_id):
+    path = _manifest_path(job_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Corrupt checkpoint for {job_id}: {e}")
+        return None
+
+def create(job_id, params):
+    """
+    New manifest for a job. params holds the /create arguments needed to resume it.
+    """
+    manifest = {
+        'job_id': job_id,
+        'params': params,
+        'status': 'queued',
+        'completed_stages': [],
+        'created_at': time.time()
+    }
+    save(manifest)
+    return manifest
+
+def is_done(manifest, stage):
+    return stage in manifest['completed_stages']
+
+def complete_stage(manifest, stage):
+    if stage not in manifest['completed_stages']:
+        manifest['completed_stages'].append(stage)
+    save(manifest)
+
+def finish(manifest, status, error=None):
+    manifest['status'] = status
+    if error:
+        manifest['error'] = error
+    save(manifest)
+
+def remove(job_id):
+    try:
+        os.remove(_manifest_path(job_id))
+    except OSError:
+        pass
+
+def list_all():
+    if not os.path.isdir(Config.CHECKPOINT_FOLDER):
+        return []
+
+    manifests = []
+    for filename in os.listdir(Config.CHECKPOINT_FOLDER):
+        if not filename.endswith('.json'):
+            continue
+        manifest = load(filename[:-len('.json')])
+        if manifest:
+            manifests.append(manifest)
+
+    manifests.sort(key=lambda m: m.get('created_at', 0))
+    return manifests
+
+def list_unfinished():
+    """
+    Manifests of jobs that were interrupted (e.g. by a server restart).
+    """
+    return [m for m in list_all() if m.get('status') not in FINAL_STATUSES]
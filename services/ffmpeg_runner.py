@@ -0,0 +1,229 @@
+import os
+import atexit
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+try:
+    from config import Config
+except ImportError:
+    from ..config import Config
+
+class FFmpegCancelled(Exception):
+    pass
+
+class FFmpegInterrupted(FFmpegCancelled):
+    """
+    The host process is shutting down. Unlike a user cancel, the job is not
+    final and should be resumed/re-queued.
+    """
+    pass
+
+class FFmpegTimeout(Exception):
+    pass
+
+# Render slot budget: at most RENDER_SLOTS encodes run at once, each gets an equal share of cores
+_render_slots = threading.BoundedSemaphore(Config.RENDER_SLOTS)
+
+# job_id (None for untracked runs) -> set of live Popen objects, plus jobs that were cancelled
+_active = {}
+_cancelled = set()
+_lock = threading.Lock()
+_shutting_down = threading.Event()
+
+def threads_per_job():
+    """
+    Encoder/filter thread count for one render slot.
+    """
+    if Config.FFMPEG_THREADS:
+        return Config.FFMPEG_THREADS
+    return max(1, (os.cpu_count() or 1) // Config.RENDER_SLOTS)
+
+def _popen_kwargs():
+    # Own process group so the whole tree can be killed at once
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+def _niced(args):
+    """
+    Prefixes the command with `nice -n` so HTTP handling and other jobs stay
+    responsive. (No preexec_fn: it can deadlock in a multithreaded process.)
+    """
+    if os.name == 'nt' or not Config.FFMPEG_NICE:
+        return args
+    nice_path = shutil.which('nice')
+    if not nice_path:
+        return args
+    return [nice_path, '-n', str(Config.FFMPEG_NICE)] + args
+
+def _kill_tree(proc):
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(proc.pid)], capture_output=True)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except Exception as e:
+        print(f"Failed to kill ffmpeg {proc.pid}: {e}")
+        proc.kill()
+
+def is_cancelled(job_id):
+    with _lock:
+        return job_id in _cancelled
+
+def cancel(job_id):
+    """
+    Marks the job as cancelled and kills any ffmpeg process tree it owns.
+    """
+    with _lock:
+        _cancelled.add(job_id)
+        procs = list(_active.get(job_id, ()))
+    for proc in procs:
+        _kill_tree(proc)
+    return len(procs)
+
+def is_shutting_down():
+    return _shutting_down.is_set()
+
+def kill_all():
+    """
+    Kills every running ffmpeg tree. ffmpeg runs in its own session/process group,
+    so it does not get the terminal's Ctrl-C or the parent's signals by itself.
+    """
+    with _lock:
+        procs = [proc for procs in _active.values() for proc in procs]
+    for proc in procs:
+        _kill_tree(proc)
+    return len(procs)
+
+def shutdown():
+    """
+    Stops new encodes from starting and kills the running ones.
+    """
+    _shutting_down.set()
+    return kill_all()
+
+# Last resort for normal interpreter exit (runs after non-daemon threads finish)
+atexit.register(kill_all)
+
+def install_signal_handlers():
+    """
+    SIGINT/SIGTERM kill all ffmpeg trees before the process exits.
+    Call from the entry point's main thread (app.py, worker.py).
+    """
+    def handle(signum, frame):
+        killed = shutdown()
+        print(f"Signal {signum}: killed {killed} ffmpeg process(es)")
+        if signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGINT, handle)
+    signal.signal(signal.SIGTERM, handle)
+
+def _acquire_slot(job_id):
+    while not _render_slots.acquire(timeout=1):
+        if is_shutting_down():
+            raise FFmpegInterrupted("Shutting down")
+        if job_id and is_cancelled(job_id):
+            raise FFmpegCancelled(f"Job {job_id} cancelled while waiting for a render slot")
+
+def run(stream_spec, job_id=None, total_duration=None, on_progress=None, timeout=None):
+    """
+    Runs an ffmpeg-python graph in a render slot.
+    - Progress is read live from `-progress pipe:1` and reported as a 0..1 fraction.
+    - Only the last lines of stderr are kept (for error reporting), not the whole log.
+    - The process tree is killed on cancel(job_id) or after `timeout` seconds.
+    """
+    import ffmpeg # Deferred, the web tier only needs cancel()
+    timeout = timeout or Config.FFMPEG_TIMEOUT
+    threads = threads_per_job()
+
+    stream_spec = stream_spec.global_args(
+        '-nostdin', '-nostats', '-progress', 'pipe:1',
+        '-filter_threads', str(threads),
+        '-filter_complex_threads', str(threads)
+    )
+    args = ffmpeg.compile(stream_spec, cmd=Config.FFMPEG_PATH, overwrite_output=True)
+
+    _acquire_slot(job_id)
+    try:
+        if is_shutting_down():
+            raise FFmpegInterrupted("Shutting down")
+        if job_id and is_cancelled(job_id):
+            raise FFmpegCancelled(f"Job {job_id} cancelled")
+
+        proc = subprocess.Popen(
+            _niced(args),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **_popen_kwargs()
+        )
+        with _lock:
+            _active.setdefault(job_id, set()).add(proc)
+
+        # Drain stderr in the background, keeping a bounded tail
+        stderr_tail = deque(maxlen=200)
+        def drain():
+            for line in iter(proc.stderr.readline, b''):
+                stderr_tail.append(line)
+        drain_thread = threading.Thread(target=drain, daemon=True)
+        drain_thread.start()
+
+        timed_out = threading.Event()
+        def on_timeout():
+            timed_out.set()
+            _kill_tree(proc)
+        watchdog = threading.Timer(timeout, on_timeout)
+        watchdog.daemon = True
+        watchdog.start()
+
+        started = time.time()
+        try:
+            try:
+                for raw in iter(proc.stdout.readline, b''):
+                    key, _, value = raw.decode(errors='ignore').strip().partition('=')
+                    if key in ('out_time_us', 'out_time_ms') and total_duration and on_progress:
+                        try:
+                            seconds = int(value) / 1000000 # Both keys are microseconds
+                        except ValueError:
+                            continue
+                        on_progress(min(1.0, max(0.0, seconds / total_duration)))
+            except BaseException:
+                # e.g. on_progress failed: don't leave ffmpeg running unsupervised on a full pipe
+                _kill_tree(proc)
+                proc.wait()
+                raise
+            proc.wait()
+        finally:
+            watchdog.cancel()
+            drain_thread.join(timeout=5)
+            with _lock:
+                _active.get(job_id, set()).discard(proc)
+
+        if is_shutting_down():
+            raise FFmpegInterrupted("Shutting down")
+        if job_id and is_cancelled(job_id):
+            raise FFmpegCancelled(f"Job {job_id} cancelled")
+        if timed_out.is_set():
+            raise FFmpegTimeout(f"ffmpeg exceeded {timeout}s (ran {time.time() - started:.0f}s)")
+        if proc.returncode != 0:
+            raise ffmpeg.Error('ffmpeg', b'', b''.join(stderr_tail))
+
+        if on_progress:
+            on_progress(1.0)
+    finally:
+        _render_slots.release()
+
+def forget(job_id):
+    """
+    Drops bookkeeping for a finished job.
+    """
+    with _lock:
+        _active.pop(job_id, None)
+        _cancelled.discard(job_id)
@@ -0,0 +1,265 @@
+import json
+import time
+import sqlite3
+import importlib
+import threading
+from abc import ABC, abstractmethod
+try:
+    from config import Config
+except ImportError:
+    from ..config import Config
+
+class JobQueue(ABC):
+    """
+    Protocol between the web tier and render workers. Subclass it to plug in
+    another backend (Redis, SQS, ...) and point JOB_QUEUE_BACKEND at it; a
+    backend missing any method fails when it is created, not mid-job.
+
+    A job has a payload (the /create parameters) and a state dict (status,
+    progress, outputs) that the worker updates and /status reads.
+    """
+
+    @abstractmethod
+    def enqueue(self, job_id, payload):
+        pass
+
+    @abstractmethod
+    def claim(self, worker_id):
+        """
+        Takes the next queued job (or one whose worker stopped heartbeating).
+        Returns (job_id, payload) or None.
+        """
+
+    @abstractmethod
+    def release(self, job_id):
+        """
+        Puts a claimed job back in the queue (worker shutting down), so another
+        worker picks it up right away instead of after the lease expires.
+        """
+
+    @abstractmethod
+    def update(self, job_id, fields):
+        """
+        Merges fields into the job state. Also counts as a heartbeat.
+        """
+
+    @abstractmethod
+    def get(self, job_id):
+        """
+        Current job state dict, or None.
+        """
+
+    @abstractmethod
+    def request_cancel(self, job_id):
+        """
+        Flags the job for cancellation (DELETE /jobs/<id>).
+        """
+
+    @abstractmethod
+    def is_cancel_requested(self, job_id):
+        pass
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Default backend: one SQLite file shared by the web tier and the workers on a host.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.JOB_QUEUE_PATH
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        # New connection per call, SQLite connections must not be shared across threads
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS jobs (
+                            id TEXT PRIMARY KEY,
+                            payload TEXT NOT NULL,
+                            state TEXT NOT NULL,
+                            status TEXT NOT NULL,
+                            worker_id TEXT,
+                            cancel_requested INTEGER NOT NULL DEFAULT 0,
+                            created_at REAL NOT NULL,
+                            heartbeat_at REAL
+                        )
+                    """)
+                    conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+                    self._ready = True
+        return conn
+
+    def enqueue(self, job_id, payload):
+        state = {'status': 'queued', 'progress': 0, 'prompt': payload.get('prompt')}
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, payload, state, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, json.dumps(payload), json.dumps(state), time.time())
+            )
+        finally:
+            conn.close()
+
+    def claim(self, worker_id):
+        stale_before = time.time() - Config.JOB_LEASE_SECONDS
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front, so two workers can't claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            self._finalize_abandoned_cancels(conn, stale_before)
+            row = conn.execute(
+                """
+                SELECT id, payload FROM jobs
+                WHERE cancel_requested = 0
+                  AND (status = 'queued' OR (status = 'running' AND heartbeat_at < ?))
+                ORDER BY created_at LIMIT 1
+                """,
+                (stale_before,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, heartbeat_at = ? WHERE id = ?",
+                (worker_id, time.time(), row['id'])
+            )
+            conn.execute("COMMIT")
+            return row['id'], json.loads(row['payload'])
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _finalize_abandoned_cancels(self, conn, stale_before):
+        # A job cancelled while its worker died is never reclaimed, so close it out here
+        rows = conn.execute(
+            """
+            SELECT id, state FROM jobs
+            WHERE status = 'running' AND heartbeat_at < ? AND cancel_requested = 1
+            """,
+            (stale_before,)
+        ).fetchall()
+        for row in rows:
+            state = json.loads(row['state'])
+            state['status'] = 'cancelled'
+            conn.execute("UPDATE jobs SET state = ?, status = 'cancelled' WHERE id = ?", (json.dumps(state), row['id']))
+
+    def release(self, job_id):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT state FROM jobs WHERE id = ? AND status = 'running'", (job_id,)).fetchone()
+            if row is not None:
+                state = json.loads(row['state'])
+                state['status'] = 'queued'
+                conn.execute(
+                    "UPDATE jobs SET state = ?, status = 'queued', worker_id = NULL, heartbeat_at = NULL WHERE id = ?",
+                    (json.dumps(state), job_id)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def update(self, job_id, fields):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return
+            state = json.loads(row['state'])
+            state.update(fields)
+            status = state.get('status')
+            # The row status only tracks queue bookkeeping: running until a final state
+            row_status = status if status in ('completed', 'failed', 'cancelled') else 'running'
+            conn.execute(
+                "UPDATE jobs SET state = ?, status = ?, heartbeat_at = ? WHERE id = ?",
+                (json.dumps(state), row_status, time.time(), job_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return json.loads(row['state']) if row else None
+        finally:
+            conn.close()
+
+    def request_cancel(self, job_id):
+        conn = self._connect()
+        try:
+            # One transaction, so a worker can't claim the row between the flag and the status check
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            # Jobs nobody picked up yet are cancelled right away
+            row = conn.execute("SELECT state, status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row and row['status'] == 'queued':
+                state = json.loads(row['state'])
+                state['status'] = 'cancelled'
+                conn.execute("UPDATE jobs SET state = ?, status = 'cancelled' WHERE id = ?", (json.dumps(state), job_id))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def is_cancel_requested(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return bool(row and row['cancel_requested'])
+        finally:
+            conn.close()
+
+class QueueJobState(dict):
+    """
+    Job state handed to the pipeline by a worker: every assignment is also
+    written to the queue, so /status on the web tier sees it.
+    """
+
+    def __init__(self, queue, job_id, initial=None):
+        super().__init__(initial or {})
+        self.queue = queue
+        self.job_id = job_id
+
+    def __setitem__(self, key, value):
+        changed = self.get(key) != value
+        super().__setitem__(key, value)
+        if changed:
+            self.queue.update(self.job_id, {key: value})
+
+_queue = None
+
+def get_queue():
+    """
+    The configured queue backend ('sqlite' or 'package.module:ClassName').
+    """
+    global _queue
+    if _queue is None:
+        backend = Config.JOB_QUEUE_BACKEND
+        if backend == 'sqlite':
+            _queue = SQLiteJobQueue()
+        else:
+            module_name, _, class_name = backend.partition(':')
+            _queue = getattr(importlib.import_module(module_name), class_name)()
+    return _queue
@@ -0,0 +1,69 @@
+import os
+import mimetypes
+from flask import request, send_file, Response
+try:
+    from config import Config
+except ImportError:
+    from ..config import Config
+
+def _resolve(path):
+    """
+    Returns the absolute path of a job asset, or None if it is missing on disk.
+    """
+    if not path:
+        return None
+    abs_path = os.path.abspath(path)
+    if not os.path.isfile(abs_path):
+        return None
+    return abs_path
+
+def _accel_redirect(abs_path, as_attachment):
+    """
+    Hands the transfer off to a front proxy (nginx X-Accel-Redirect).
+    The proxy serves the bytes itself, including Range and conditional GETs.
+    """
+    media_root = os.path.abspath(Config.MEDIA_ROOT)
+    rel_path = os.path.relpath(abs_path, media_root).replace(os.sep, '/')
+    if rel_path.startswith('..'):
+        return None  # Outside the proxied tree, serve it ourselves
+
+    prefix = Config.ACCEL_REDIRECT_PREFIX.rstrip('/')
+    mimetype = mimetypes.guess_type(abs_path)[0] or 'application/octet-stream'
+
+    response = Response(status=200, mimetype=mimetype)
+    response.headers['X-Accel-Redirect'] = f"{prefix}/{rel_path}"
+    disposition = 'attachment' if as_attachment else 'inline'
+    response.headers['Content-Disposition'] = f'{disposition}; filename="{os.path.basename(abs_path)}"'
+    return response
+
+def send_media(path, as_attachment=None):
+    """
+    Serves a rendered asset (MP4, JPG) with HTTP caching and seeking support.
+    - Range requests are answered with 206 Partial Content so <video> can seek.
+    - ETag / Last-Modified let browsers revalidate with 304 Not Modified.
+    - If ACCEL_REDIRECT_PREFIX is set, the file is offloaded to the front proxy.
+    - If USE_X_SENDFILE is set, Flask emits X-Sendfile instead of streaming.
+    Returns None if the file does not exist.
+    """
+    abs_path = _resolve(path)
+    if not abs_path:
+        return None
+
+    # ?inline=1 is used by the in-browser preview player
+    if as_attachment is None:
+        as_attachment = request.args.get('inline') is None
+
+    if Config.ACCEL_REDIRECT_PREFIX:
+        response = _accel_redirect(abs_path, as_attachment)
+        if response is not None:
+            return response
+
+    # conditional=True enables Range/206, If-None-Match and If-Modified-Since
+    return send_file(
+        abs_path,
+        as_attachment=as_attachment,
+        conditional=True,
+        etag=True,
+        last_modified=os.path.getmtime(abs_path),
+        max_age=Config.MEDIA_CACHE_MAX_AGE
+    )
@@ -1,75 +1,244 @@
 import requests
 import os
+import math
 import random
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 try:
     from config import Config
 except ImportError:
     # Handle standalone testing if config isn't importable
     from ..config import Config
 
-def fetch_content(query, api_key, orientation='landscape'):
+from services.asset_lifecycle import touch
+
+def _normalize_query(query):
     """
-    Fetches a VIDEO from Pexels based on the query.
-    Returns the path to the saved local file.
+    Dedupe key for near-identical queries: case, spacing and word order are ignored.
+    """
+    words = query.lower().split()
+    return " ".join(sorted(set(words)))
+
+def _target_size(orientation):
+    if orientation == 'landscape':
+        return 1920, 1080
+    return 1080, 1920
+
+def _best_rendition(video_files, orientation):
+    """
+    Picks the best-fit file for the canvas from a Pexels 'video_files' list.
+    """
+    target_w, target_h = _target_size(orientation)
+
+    # Sort by best fit (tiers first, so a small width can never outrank an exact match)
+    def score_file(vf):
+        w, h = vf.get('width') or 0, vf.get('height') or 0
+        if w == target_w and h == target_h: return (2, 0) # Exact match
+        if w >= target_w and h >= target_h: return (1, -w) # Higher res is good, smallest first
+        return (0, w) # Else sort by width
+
+    if not video_files:
+        return None
+    return max(video_files, key=score_file)
+
+def _search_videos(query, api_key, orientation, per_page=3):
+    """
+    One Pexels search. Returns candidates as (video, best_rendition) with the
+    rendition already chosen, so callers never re-sort 'video_files'.
     """
     headers = {
         'Authorization': api_key
     }
     # Pexels orientation values: 'landscape', 'portrait', 'square'
-    url = f"https://api.pexels.com/videos/search?query={query}&per_page=3&orientation={orientation}&size=medium"
-    
+    params = {'query': query, 'per_page': per_page, 'orientation': orientation, 'size': 'medium'}
+    response = requests.get("https://api.pexels.com/videos/search", headers=headers, params=params, timeout=15)
+    data = response.json()
+
+    candidates = []
+    for video in data.get('videos', []):
+        rendition = _best_rendition(video.get('video_files', []), orientation)
+        if rendition:
+            candidates.append((video, rendition))
+    return candidates
+
+def _cached_clip(video_id, seconds):
+    """
+    A previously downloaded copy of the clip that is long enough, if any.
+    vid_<id>.mp4 is a full download, vid_<id>_<n>s.mp4 holds the first n seconds.
+    """
+    full_path = os.path.join(Config.UPLOAD_FOLDER, f"vid_{video_id}.mp4")
+    if os.path.exists(full_path):
+        return full_path
+
+    prefix = f"vid_{video_id}_"
+    for filename in os.listdir(Config.UPLOAD_FOLDER):
+        if not (filename.startswith(prefix) and filename.endswith('s.mp4')):
+            continue
+        try:
+            cached_seconds = int(filename[len(prefix):-len('s.mp4')])
+        except ValueError:
+            continue
+        if seconds and cached_seconds >= seconds:
+            return os.path.join(Config.UPLOAD_FOLDER, filename)
+    return None
+
+def _download_prefix(url, seconds, filepath):
+    """
+    Stream-copies only the first `seconds` of a remote MP4. ffmpeg reads it with
+    HTTP range requests, so the rest of the file is never transferred.
+    """
+    import ffmpeg
+    # Unique temp name, so concurrent downloads of the same clip never share a file
+    fd, tmp_path = tempfile.mkstemp(dir=Config.UPLOAD_FOLDER, suffix='.tmp.mp4')
+    os.close(fd)
+    args = (
+        ffmpeg
+        .input(url, t=seconds, rw_timeout=30000000) # 30s network timeout (microseconds)
+        .output(tmp_path, c='copy', an=None, movflags='+faststart')
+        .overwrite_output()
+        .compile(cmd=Config.FFMPEG_PATH)
+    )
     try:
-        response = requests.get(url, headers=headers)
-        data = response.json()
-        
-        videos = data.get('videos', [])
-        if not videos:
-            print(f"No videos found for {query}. Trying AI Image...")
-            return generate_ai_image(query, orientation) 
-            
-        video = random.choice(videos)
-        video_files = video.get('video_files', [])
-        best_file = None
-        
-        # Target Dimensions
-        target_w = 1920 if orientation == 'landscape' else 1080
-        target_h = 1080 if orientation == 'landscape' else 1920
-        
-        # Sort by best fit
-        def score_file(vf):
-            w, h = vf.get('width', 0), vf.get('height', 0)
-            if w == target_w and h == target_h: return 100 # Exact match
-            if w >= target_w and h >= target_h: return 50 # Higher res is good
-            return w # Else sort by width
-            
-        video_files.sort(key=score_file, reverse=True)
-        if video_files:
-            best_file = video_files[0]
-            
-        if not best_file:
+        # Hard wall-clock limit on top of rw_timeout (a slow trickle never trips that one)
+        result = subprocess.run(args, stdin=subprocess.DEVNULL, capture_output=True, timeout=Config.CLIP_DOWNLOAD_TIMEOUT)
+        if result.returncode != 0:
+            raise ffmpeg.Error('ffmpeg', result.stdout, result.stderr)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _download_video(video, rendition, seconds=None):
+    """
+    Downloads the chosen rendition (cached by Pexels video id).
+    If `seconds` is well below the clip length, only that prefix is fetched.
+    """
+    if seconds:
+        seconds = int(math.ceil(seconds + Config.CLIP_TRIM_MARGIN))
+
+    cached = _cached_clip(video['id'], seconds)
+    if cached:
+        touch(cached) # Reused clip, keep it warm for GC
+        return cached
+
+    clip_duration = video.get('duration') or 0
+    if seconds and clip_duration and seconds < clip_duration * Config.CLIP_TRIM_RATIO:
+        filepath = os.path.join(Config.UPLOAD_FOLDER, f"vid_{video['id']}_{seconds}s.mp4")
+        try:
+            _download_prefix(rendition['link'], seconds, filepath)
+            return filepath
+        except Exception as e:
+            print(f"Prefix download failed for video {video['id']}, fetching full file: {e}")
+
+    filename = f"vid_{video['id']}.mp4"
+    filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
+
+    # Download
+    # Use a timeout to avoid hanging
+    video_response = requests.get(rendition['link'], stream=True, timeout=30)
+    video_response.raise_for_status()
+
+    # Save (unique temp file first, so a failed or concurrent download of the
+    # same clip is never mistaken for a cached clip)
+    fd, tmp_path = tempfile.mkstemp(dir=Config.UPLOAD_FOLDER, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in video_response.iter_content(chunk_size=8192):
+                f.write(chunk)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return filepath
+
+def fetch_content(query, api_key, orientation='landscape'):
+    """
+    Fetches media for a single query through plan_media.
+    Returns the path to the saved local file.
+    """
+    return plan_media([{'image_query': query}], api_key, orientation)[0]
+
+def plan_media(segments, api_key, orientation='landscape'):
+    """
+    Fetches media for a whole script at once.
+    1. Dedupes queries (see _normalize_query) so shared queries cost one API call.
+    2. Runs the searches concurrently.
+    3. Assigns distinct clips across segments so visuals don't repeat,
+       preferring clips at least as long as the segment's narration ('duration').
+    4. Downloads the chosen clips concurrently, only the prefix the narration needs.
+    Returns a list of paths aligned with `segments` (AI image fallback where needed).
+    """
+    groups = {}
+    for i, segment in enumerate(segments):
+        key = _normalize_query(segment.get('image_query', ''))
+        groups.setdefault(key, {'query': segment.get('image_query', ''), 'indexes': []})['indexes'].append(i)
+
+    # Ask for a few spare results per query so repeated queries can get different clips
+    def search(group):
+        per_page = min(15, len(group['indexes']) + 2)
+        try:
+            candidates = _search_videos(group['query'], api_key, orientation, per_page=per_page)
+        except Exception as e:
+            print(f"Error searching Pexels for '{group['query']}': {e}")
+            return []
+        random.shuffle(candidates)
+        return candidates
+
+    with ThreadPoolExecutor(max_workers=Config.MEDIA_WORKERS) as pool:
+        results = dict(zip(groups, pool.map(search, groups.values())))
+    print(f"Media plan: {len(segments)} segments, {len(groups)} unique queries")
+
+    # Distinct clips across the whole script, falling back to reuse if a query runs dry
+    used_ids = set()
+    assignments = [None] * len(segments)
+    for key, group in groups.items():
+        candidates = results[key]
+        for i in group['indexes']:
+            # Prefer clips that cover the narration, so they don't have to loop
+            need = segments[i].get('duration') or 0
+            fresh = [c for c in candidates if c[0]['id'] not in used_ids]
+            fresh.sort(key=lambda c: (c[0].get('duration') or 0) < need)
+            if fresh:
+                choice = fresh[0]
+            elif candidates:
+                choice = candidates[i % len(candidates)]
+            else:
+                continue
+            used_ids.add(choice[0]['id'])
+            assignments[i] = choice
+
+    # Each distinct clip is downloaded once (long enough for every segment using it),
+    # even if a dry query made segments share it
+    unique = {}
+    needed = {}
+    for segment, choice in zip(segments, assignments):
+        if choice:
+            video_id = choice[0]['id']
+            unique[video_id] = choice
+            needed[video_id] = max(needed.get(video_id, 0), segment.get('duration') or 0)
+
+    def download(video_id):
+        try:
+            return _download_video(*unique[video_id], seconds=needed[video_id] or None)
+        except Exception as e:
+            print(f"Error downloading Pexels video {video_id}: {e}")
             return None
 
-        video_url = best_file['link']
-        
-        # Download
-        # Use a timeout to avoid hanging
-        video_response = requests.get(video_url, stream=True, timeout=30)
-        
-        # Save
-        filename = f"vid_{video['id']}.mp4"
-        filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
-        
-        if not os.path.exists(filepath):
-            with open(filepath, 'wb') as f:
-                for chunk in video_response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-        
-        return filepath
+    with ThreadPoolExecutor(max_workers=Config.MEDIA_WORKERS) as pool:
+        downloaded = dict(zip(unique, pool.map(download, unique)))
 
-    except Exception as e:
-        print(f"Error fetching Pexels video for '{query}': {e}")
-        # Fallback to AI Image
-        return generate_ai_image(query, orientation)
+    paths = []
+    for segment, choice in zip(segments, assignments):
+        path = downloaded.get(choice[0]['id']) if choice else None
+        if not path:
+            print(f"No video for '{segment.get('image_query')}'. Trying AI Image...")
+            path = generate_ai_image(segment.get('image_query', ''), orientation)
+        paths.append(path)
+    return paths
 
 def generate_ai_image(prompt, orientation='landscape'):
     """
@@ -0,0 +1,202 @@
+import os
+try:
+    from config import Config
+except ImportError:
+    from ..config import Config
+
+from services import ffmpeg_runner, checkpoint
+
+def preload():
+    """
+    Imports the heavy pipeline services up front. Render workers call this at
+    startup (before forking job threads), the web tier never does.
+    """
+    import services.script_gen
+    import services.media_source
+    import services.tts
+    import services.video_editor
+    import services.thumbnail_generator
+
+def _check_cancelled(job_id):
+    # Stops the pipeline between stages on shutdown or once DELETE /jobs/<id> was called
+    if ffmpeg_runner.is_shutting_down():
+        raise ffmpeg_runner.FFmpegInterrupted("Shutting down")
+    if ffmpeg_runner.is_cancelled(job_id):
+        raise ffmpeg_runner.FFmpegCancelled(f"Job {job_id} cancelled")
+
+def _render_progress(job, start, end):
+    # Maps ffmpeg's 0..1 progress onto the job's progress range
+    def update(fraction):
+        job['progress'] = start + int((end - start) * fraction)
+    return update
+
+def _file_ready(path):
+    return bool(path) and os.path.exists(path)
+
+def process_video_job(job_id, prompt, duration, voice_id, orientation, mood, job):
+    """
+    Runs every stage of a video job.
+    job: Mutable mapping the status/progress/outputs are written to. The web tier
+    passes its in-memory dict, a render worker passes queue-backed state.
+    """
+    # Pipeline services (ffmpeg, groq, edge_tts, PIL) are imported on first job,
+    # not at module load, so the web tier starts fast. See profile_imports.py.
+    from services.script_gen import generate_script, translate_script
+    from services.media_source import plan_media
+    from services.tts import generate_audio
+    from services.video_editor import assemble_video, probe_duration
+    from services.thumbnail_generator import generate_thumbnail
+
+    # Resume from the last completed stage if a checkpoint exists
+    manifest = checkpoint.load(job_id) or checkpoint.create(job_id, {
+        'prompt': prompt,
+        'duration': duration,
+        'voice_id': voice_id,
+        'orientation': orientation,
+        'mood': mood
+    })
+    # Every start counts, so a job that keeps crashing the process is given up on
+    manifest['attempts'] = manifest.get('attempts', 0) + 1
+    if manifest['attempts'] > Config.JOB_MAX_ATTEMPTS:
+        error = f"Gave up after {Config.JOB_MAX_ATTEMPTS} interrupted attempts"
+        job['status'] = 'failed'
+        job['error'] = error
+        checkpoint.finish(manifest, 'failed', error)
+        print(f"Job {job_id} failed: {error}")
+        return
+    manifest['status'] = 'running'
+    checkpoint.save(manifest)
+
+    try:
+        print(f"Job {job_id} Started: {prompt} ({duration}, {orientation}, {mood})")
+        if manifest['completed_stages']:
+            print(f"Resuming job {job_id} after: {', '.join(manifest['completed_stages'])}")
+        job['status'] = 'generating_script'
+        job['progress'] = 10
+        
+        # 1. Generate Script (Groq)
+        if checkpoint.is_done(manifest, 'script'):
+            script_data = manifest['script']
+        else:
+            script_data = generate_script(prompt, duration, voice_id, Config.GROQ_API_KEY)
+            manifest['script'] = script_data
+            checkpoint.complete_stage(manifest, 'script')
+        job['script'] = script_data
+        job['progress'] = 30
+        job['status'] = 'generating_audio'
+        _check_cancelled(job_id)
+
+        # 2. Generate Audio (first, so media selection knows each narration's length)
+        for segment in script_data:
+            if _file_ready(segment.get('audio_path')) and segment.get('duration'):
+                continue
+            segment['audio_path'] = generate_audio(segment['text'], voice_id)
+            segment['duration'] = probe_duration(segment['audio_path'])
+            checkpoint.save(manifest)
+        checkpoint.complete_stage(manifest, 'audio')
+        
+        job['progress'] = 50
+        job['status'] = 'fetching_media'
+        _check_cancelled(job_id)
+
+        # 3. Fetch Media (Video)
+        # Planned for the whole script at once; segments whose file survived a restart are skipped
+        missing = [segment for segment in script_data if not _file_ready(segment.get('image_path'))]
+        if missing:
+            for segment, path in zip(missing, plan_media(missing, Config.PEXELS_API_KEY, orientation)):
+                segment['image_path'] = path
+        checkpoint.complete_stage(manifest, 'media')
+        
+        job['progress'] = 70
+        job['status'] = 'rendering_video'
+        _check_cancelled(job_id)
+
+        # 4. Assemble Video (Main)
+        output_path = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}.mp4")
+        hls_dir = None
+        if Config.HLS_ENABLED:
+            hls_dir = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_hls")
+            # Published before rendering so the frontend can start playback as segments land
+            job['hls_playlist'] = '/' + os.path.join(hls_dir, 'master.m3u8').replace(os.sep, '/')
+        if not (checkpoint.is_done(manifest, 'render') and _file_ready(output_path)):
+            assemble_video(script_data, output_path, orientation, mood, hls_dir=hls_dir,
+                           job_id=job_id, on_progress=_render_progress(job, 70, 85))
+            manifest['output_path'] = output_path
+            checkpoint.complete_stage(manifest, 'render')
+        
+        # 5. [NEW] Generate Thumbnail
+        thumb_path = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}.jpg")
+        if not (checkpoint.is_done(manifest, 'thumbnail') and _file_ready(thumb_path)):
+            generate_thumbnail(output_path, prompt, thumb_path)
+            manifest['thumbnail_path'] = thumb_path
+            checkpoint.complete_stage(manifest, 'thumbnail')
+        
+        job['output_path'] = output_path
+        job['thumbnail_path'] = thumb_path
+        job['dubbed_versions'] = manifest.setdefault('dubbed_versions', [])
+        job['progress'] = 90 # almost done
+        
+        # 6. [NEW] Multi-Language Dubbing
+        # Automatically generate Hindi version if original is English
+        if "en-" in voice_id and "hi-IN" not in voice_id and not checkpoint.is_done(manifest, 'dub'):
+            try:
+                print("Auto-Dubbing to Hindi...")
+                target_lang = "Hindi"
+                target_voice = "hi-IN-SwaraNeural" # Female Hindi
+                
+                # A. Translate Script (checkpointed, it is another paid LLM call)
+                dub_script = manifest.get('dub_script')
+                if not dub_script:
+                    dub_script = translate_script(script_data, target_lang, Config.GROQ_API_KEY)
+                    manifest['dub_script'] = dub_script
+                    checkpoint.save(manifest)
+                
+                # B. Generate Audio for Dub
+                for segment in dub_script:
+                    # Regenerate audio with new text and voice
+                    segment['audio_path'] = generate_audio(segment['text'], target_voice)
+                    segment['duration'] = probe_duration(segment['audio_path'])
+                    # Keep original image_path!
+                checkpoint.save(manifest)
+                
+                # C. Assemble Dubbed Video
+                dub_output_path = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_hi.mp4")
+                assemble_video(dub_script, dub_output_path, orientation, mood,
+                               job_id=job_id, on_progress=_render_progress(job, 90, 99))
+                
+                # Reassigned, not appended, so queue-backed job state sees the change
+                job['dubbed_versions'] = job['dubbed_versions'] + [{
+                    'lang': 'Hindi',
+                    'path': dub_output_path
+                }]
+                manifest['dubbed_versions'] = job['dubbed_versions']
+                checkpoint.complete_stage(manifest, 'dub')
+                print(f"Dubbing complete: {dub_output_path}")
+                
+            except ffmpeg_runner.FFmpegCancelled:
+                raise
+            except Exception as e:
+                print(f"Dubbing failed: {e}")
+                # Don't fail the whole job, just log it
+
+        job['progress'] = 100
+        job['status'] = 'completed'
+        checkpoint.finish(manifest, 'completed')
+
+    except ffmpeg_runner.FFmpegInterrupted:
+        # Not final: the manifest stays 'running' so the job resumes on restart,
+        # and a clean shutdown doesn't count as a failed attempt
+        manifest['attempts'] -= 1
+        checkpoint.save(manifest)
+        print(f"Job {job_id} interrupted by shutdown")
+    except ffmpeg_runner.FFmpegCancelled:
+        job['status'] = 'cancelled'
+        checkpoint.finish(manifest, 'cancelled')
+        print(f"Job {job_id} cancelled")
+    except Exception as e:
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        checkpoint.finish(manifest, 'failed', str(e))
+        print(f"Job {job_id} failed: {e}")
+    finally:
+        ffmpeg_runner.forget(job_id)
@@ -1,13 +1,12 @@
 import os
 import json
 import time
-from groq import Groq
 try:
     from config import Config
 except ImportError:
     from ..config import Config
 
-from services.search_engine import search_web
+from services.search_engine import get_search_context
 
 def generate_script(prompt, duration, voice_id="en-US", api_key=None):
     """
@@ -19,6 +18,7 @@ def generate_script(prompt, duration, voice_id="en-US", api_key=None):
         print("Error: No Groq API Key provided.")
         return [{"text": "Error: Groq API Key missing.", "image_query": "error"}]
 
+    from groq import Groq # Deferred, only workers pay for the SDK import
     client = Groq(api_key=api_key)
     
     # Calculate limits
@@ -39,7 +39,7 @@ def generate_script(prompt, duration, voice_id="en-US", api_key=None):
     news_keywords = ["news", "latest", "update", "today", "current", "trending", "headline"]
     if any(k in prompt.lower() for k in news_keywords):
         print(f"News intent detected for '{prompt}'. Searching web...")
-        search_results = search_web(prompt)
+        search_results = get_search_context(prompt)
         if search_results:
             context_part = f"\n\n[REAL-TIME SEARCH CONTEXT]\n{search_results}\n\nINSTRUCTION: Use the above Real-Time Context to write the script. Verify facts from it."
 
@@ -117,6 +117,7 @@ def translate_script(script_data, target_language, api_key=None):
     Translates the 'text' fields of the script to the target language using Groq.
     """
     api_key = api_key or Config.GROQ_API_KEY
+    from groq import Groq
     client = Groq(api_key=api_key)
     
     system_instruction = f"""
@@ -1,4 +1,39 @@
-from duckduckgo_search import DDGS
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+try:
+    from config import Config
+except ImportError:
+    from ..config import Config
+
+# normalized query -> (expires_at, summary)
+_cache = {}
+# normalized query -> Future of an in-flight search (concurrent callers share it)
+_inflight = {}
+# How often each query was asked for recently (decays every prefetch interval), drives prefetching
+_popularity = Counter()
+_lock = threading.Lock()
+
+# Popularity is halved every prefetch interval; queries below this count are forgotten
+_POPULARITY_DECAY = 0.5
+_POPULARITY_FLOOR = 0.5
+# A query must have been asked this often (decayed) to be prefetched
+_TRENDING_MIN_COUNT = 2
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='search')
+_local = threading.local()
+_prefetch_thread = None
+
+def _normalize(query):
+    return " ".join(query.lower().split())
+
+def _client():
+    # One DDGS session per worker thread instead of one per call
+    if not hasattr(_local, 'ddgs'):
+        from duckduckgo_search import DDGS # Deferred, only loaded once a search actually runs
+        _local.ddgs = DDGS()
+    return _local.ddgs
 
 def search_web(query, max_results=5):
     """
@@ -6,16 +41,148 @@ def search_web(query, max_results=5):
     """
     print(f"Searching web for: {query}...")
     try:
-        results = DDGS().text(query, max_results=max_results)
+        results = _client().text(query, max_results=max_results)
         
         if not results:
             return None
             
-        summary = "Web Search Results:\n"
+        lines = ["Web Search Results:"]
         for i, r in enumerate(results):
-            summary += f"{i+1}. {r['title']}: {r['body']}\n"
+            lines.append(f"{i+1}. {r['title']}: {r['body']}")
             
+        return "\n".join(lines) + "\n"
+    except Exception as e:
+        print(f"Search failed: {e}")
+        return None
+
+def _cached(key):
+    with _lock:
+        entry = _cache.get(key)
+        if entry and entry[0] <= time.time():
+            del _cache[key]
+            entry = None
+    return entry
+
+def _prune_cache():
+    """
+    Drops expired entries and, over SEARCH_CACHE_MAX, the ones expiring soonest.
+    Call with _lock held.
+    """
+    now = time.time()
+    for key in [k for k, (expires_at, _) in _cache.items() if expires_at <= now]:
+        del _cache[key]
+    overflow = len(_cache) - Config.SEARCH_CACHE_MAX
+    if overflow > 0:
+        for key in sorted(_cache, key=lambda k: _cache[k][0])[:overflow]:
+            del _cache[key]
+
+def _decay_popularity():
+    """
+    Halves every count and forgets rare queries, so old prompts stop being "trending".
+    Also keeps at most SEARCH_POPULARITY_MAX queries.
+    """
+    with _lock:
+        for key in list(_popularity):
+            _popularity[key] *= _POPULARITY_DECAY
+            if _popularity[key] < _POPULARITY_FLOOR:
+                del _popularity[key]
+        _trim_popularity()
+
+def _trim_popularity():
+    # Call with _lock held
+    if len(_popularity) > Config.SEARCH_POPULARITY_MAX:
+        keep = dict(_popularity.most_common(Config.SEARCH_POPULARITY_MAX))
+        _popularity.clear()
+        _popularity.update(keep)
+
+def _search_and_cache(key, query):
+    try:
+        summary = search_web(query)
+        # Failed/empty searches are cached too (shorter), so a flaky backend isn't hammered
+        ttl = Config.SEARCH_CACHE_TTL if summary else Config.SEARCH_CACHE_TTL / 4
+        with _lock:
+            _cache[key] = (time.time() + ttl, summary)
+            _prune_cache()
         return summary
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+def _submit(key, query):
+    with _lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = _executor.submit(_search_and_cache, key, query)
+            _inflight[key] = future
+    return future
+
+def get_search_context(query, timeout=None):
+    """
+    Web search summary for prompt context, or None.
+    - Cached per normalized query for SEARCH_CACHE_TTL seconds.
+    - Concurrent lookups of the same query share one search.
+    - Waits at most SEARCH_TIMEOUT seconds; on timeout the script is written
+      without context and the search still finishes into the cache.
+    """
+    key = _normalize(query)
+    if not key:
+        return None
+
+    with _lock:
+        _popularity[key] += 1
+        _trim_popularity()
+
+    entry = _cached(key)
+    if entry:
+        return entry[1]
+
+    future = _submit(key, query)
+    try:
+        return future.result(timeout=timeout or Config.SEARCH_TIMEOUT)
+    except FutureTimeout:
+        print(f"Search for '{query}' exceeded {timeout or Config.SEARCH_TIMEOUT}s, continuing without context")
+        return None
     except Exception as e:
         print(f"Search failed: {e}")
         return None
+
+def prefetch(queries):
+    """
+    Warms the cache for queries that are missing or about to expire.
+    """
+    refresh_before = time.time() + Config.SEARCH_PREFETCH_INTERVAL
+    for query in queries:
+        key = _normalize(query)
+        with _lock:
+            entry = _cache.get(key)
+        if key and (not entry or entry[0] < refresh_before):
+            _submit(key, query)
+
+def trending_queries(limit=None):
+    """
+    Most requested queries so far, plus any configured seeds.
+    """
+    with _lock:
+        top = [q for q, count in _popularity.most_common(limit or Config.SEARCH_PREFETCH_TOP) if count >= _TRENDING_MIN_COUNT]
+    return list(dict.fromkeys(Config.SEARCH_PREFETCH_QUERIES + top))
+
+def _prefetch_loop():
+    while True:
+        try:
+            prefetch(trending_queries())
+            _decay_popularity()
+            with _lock:
+                _prune_cache()
+        except Exception as e:
+            print(f"Search prefetch failed: {e}")
+        time.sleep(Config.SEARCH_PREFETCH_INTERVAL)
+
+def start_prefetch():
+    """
+    Keeps the top trending queries warm on a daemon thread.
+    """
+    global _prefetch_thread
+    if _prefetch_thread is None and Config.SEARCH_PREFETCH_INTERVAL > 0:
+        _prefetch_thread = threading.Thread(target=_prefetch_loop, daemon=True)
+        _prefetch_thread.start()
+    return _prefetch_thread
@@ -1,7 +1,6 @@
 import os
 import random
 import ffmpeg
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
 
 def generate_thumbnail(video_path, text, output_path):
     """
@@ -9,6 +8,8 @@ def generate_thumbnail(video_path, text, output_path):
     1. Extracts a frame from the middle of the video.
     2. Overlays the text (Title).
     """
+    from PIL import Image, ImageDraw, ImageFont # Deferred, only workers pay for the import
+    temp_frame = output_path + ".temp.png"
     try:
         # 1. Probe video to get duration and dimensions
         probe = ffmpeg.probe(video_path)
@@ -18,7 +19,6 @@ def generate_thumbnail(video_path, text, output_path):
         
         # 2. Extract frame at 50% timestamp
         timestamp = duration / 2
-        temp_frame = output_path + ".temp.png"
         
         (
             ffmpeg
@@ -92,10 +92,12 @@ def generate_thumbnail(video_path, text, output_path):
             img = img.convert("RGB")
             img.save(output_path, "JPEG", quality=90)
             
-            # Cleanup
-            os.remove(temp_frame)
             return output_path
             
     except Exception as e:
         print(f"Thumbnail generation failed: {e}")
         return None
+    finally:
+        # Cleanup (also on failure)
+        if os.path.exists(temp_frame):
+            os.remove(temp_frame)
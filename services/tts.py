@@ -1,9 +1,10 @@
 import asyncio
-import edge_tts
 import os
 from config import Config
+from services.asset_lifecycle import touch
 
 async def _generate_audio_async(text, voice_id, output_path):
+    import edge_tts # Deferred, only workers pay for the import
     # Tweak settings for better quality
     # Slower rate often sounds less robotic for Hindi
     rate = "-5%" if "hi-IN" in voice_id else "+0%"
@@ -23,6 +24,7 @@ def generate_audio(text, voice_id):
     output_path = os.path.join(Config.UPLOAD_FOLDER, filename)
     
     if os.path.exists(output_path):
+        touch(output_path) # Reused narration, keep it warm for GC
         return output_path
 
     # Run async function in sync wrapper
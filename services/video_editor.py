@@ -1,5 +1,6 @@
 import ffmpeg
 import os
+from services import ffmpeg_runner
 try:
     from config import Config
 except ImportError:
@@ -23,12 +24,106 @@ def text_wrap(text, font_size, max_width):
         lines.append(" ".join(current_line))
     return "\n".join(lines)
 
-def assemble_video(script_data, output_path, orientation='landscape', mood='random'):
+def probe_duration(media_path):
+    """
+    Duration of a media file in seconds.
+    """
+    probe = ffmpeg.probe(media_path)
+    return float(probe['format']['duration'])
+
+def _hls_renditions(W, H):
+    """
+    HLS variants written alongside the MP4: full canvas + a low-bitrate mobile preview.
+    'high' reuses the MP4's encode (see _tee_target), only 'low' is encoded separately.
+    """
+    if W > H:
+        low_w, low_h = 854, 480
+    else:
+        low_w, low_h = 480, 854
+
+    return [
+        {'name': 'high', 'width': W, 'height': H, 'bandwidth': 5000000},
+        {'name': 'low', 'width': low_w, 'height': low_h, 'bandwidth': 900000,
+         'kwargs': {'video_bitrate': '800k', 'maxrate': '856k', 'bufsize': '1200k', 'audio_bitrate': '64k'}},
+    ]
+
+def _write_master_playlist(hls_dir, renditions):
+    """
+    Writes master.m3u8 up front so the player can attach before the first segment exists.
+    """
+    version = 7 if Config.HLS_SEGMENT_TYPE == 'fmp4' else 3
+    lines = ["#EXTM3U", f"#EXT-X-VERSION:{version}"]
+    for r in renditions:
+        lines.append(f"#EXT-X-STREAM-INF:BANDWIDTH={r['bandwidth']},RESOLUTION={r['width']}x{r['height']}")
+        lines.append(f"{r['name']}/index.m3u8")
+
+    master_path = os.path.join(hls_dir, 'master.m3u8')
+    with open(master_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return master_path
+
+def _hls_muxer_options(hls_dir, rendition):
+    """
+    HLS muxer settings for one variant. EVENT playlists are rewritten after every
+    segment, so early segments are playable while later ones are still encoding.
+    """
+    variant_dir = os.path.join(hls_dir, rendition['name'])
+    os.makedirs(variant_dir, exist_ok=True)
+    ext = 'm4s' if Config.HLS_SEGMENT_TYPE == 'fmp4' else 'ts'
+
+    # Forward slashes: the tee muxer treats backslashes as escapes
+    playlist = os.path.join(variant_dir, 'index.m3u8').replace(os.sep, '/')
+    options = {
+        'hls_time': Config.HLS_SEGMENT_SECONDS,
+        'hls_playlist_type': 'event',
+        'hls_segment_type': Config.HLS_SEGMENT_TYPE,
+        'hls_flags': 'independent_segments',
+        'hls_segment_filename': os.path.join(variant_dir, f'seg_%03d.{ext}').replace(os.sep, '/'),
+    }
+    return playlist, options
+
+def _keyframe_args():
+    # Keyframe on every segment boundary so each segment is independently decodable
+    return {'force_key_frames': f'expr:gte(t,n_forced*{Config.HLS_SEGMENT_SECONDS})'}
+
+def _tee_target(output_path, hls_dir, rendition):
+    """
+    tee muxer spec that writes one encoded stream to both the MP4 and the 'high'
+    HLS variant, so the full-resolution encode happens only once.
+    """
+    playlist, options = _hls_muxer_options(hls_dir, rendition)
+    hls_opts = ":".join(f"{k}={v}" for k, v in options.items())
+    mp4_path = output_path.replace(os.sep, '/')
+    return f"[f=mp4:movflags=+faststart]{mp4_path}|[f=hls:{hls_opts}]{playlist}"
+
+def _hls_output(video_stream, audio_stream, hls_dir, rendition, threads):
+    """
+    Separately encoded (scaled down) HLS variant.
+    """
+    playlist, options = _hls_muxer_options(hls_dir, rendition)
+    video_stream = video_stream.filter('scale', rendition['width'], rendition['height'])
+
+    return ffmpeg.output(
+        video_stream, audio_stream, playlist,
+        vcodec='libx264', acodec='aac', pix_fmt='yuv420p',
+        threads=threads,
+        f='hls',
+        **_keyframe_args(),
+        **options,
+        **rendition['kwargs']
+    )
+
+def assemble_video(script_data, output_path, orientation='landscape', mood='random', hls_dir=None, job_id=None, on_progress=None):
     """
     Assembles video segments using ffmpeg-python.
     script_data: List of dicts with 'image_path', 'audio_path'
+    hls_dir: If set, HLS renditions + master.m3u8 are written there in the same ffmpeg pass
+             (the MP4 and the 'high' variant share one encode).
+    job_id / on_progress: Used by ffmpeg_runner for cancellation and live progress (0..1).
     """
     input_streams = []
+    total_duration = 0.0
+    threads = ffmpeg_runner.threads_per_job()
     
     # Target resolution
     if orientation == 'portrait':
@@ -44,9 +139,9 @@ def assemble_video(script_data, output_path, orientation='landscape', mood='rand
         if not media_path or not audio_path:
             continue
             
-        # Probe audio duration
-        probe = ffmpeg.probe(audio_path)
-        audio_duration = float(probe['format']['duration'])
+        # Audio duration (checkpointed by the audio stage, probe if missing)
+        audio_duration = segment.get('duration') or probe_duration(audio_path)
+        total_duration += audio_duration
         
         # Prepare Text Overlay
         # Escape special chars for drawtext
@@ -150,10 +245,41 @@ def assemble_video(script_data, output_path, orientation='landscape', mood='rand
         video_stream = ffmpeg.overlay(video_stream, logo, x=f'W-w-20', y=20)
 
     # Output
-    out = ffmpeg.output(video_stream, audio_stream, output_path, vcodec='libx264', acodec='aac', pix_fmt='yuv420p', shortest=None)
+    # +faststart moves the moov atom to the front so playback can begin before the whole file is downloaded
+    if not hls_dir:
+        outputs = [ffmpeg.output(video_stream, audio_stream, output_path, vcodec='libx264', acodec='aac', pix_fmt='yuv420p', movflags='+faststart', threads=threads, shortest=None)]
+    else:
+        high, low = _hls_renditions(W, H)
+        # A second encode needs its own thread; with a 1-thread slot budget the
+        # 'low' rendition is skipped rather than oversubscribing the slot
+        renditions = [high, low] if threads >= 2 else [high]
+        os.makedirs(hls_dir, exist_ok=True)
+        _write_master_playlist(hls_dir, renditions)
+
+        # Two encodes share the slot's thread budget, the 480p one needs far less
+        low_threads = max(1, threads // 4)
+        main_threads = threads - low_threads if len(renditions) == 2 else threads
+
+        if len(renditions) == 2:
+            video_branches = ffmpeg.filter_multi_output(video_stream, 'split', 2)
+            audio_branches = ffmpeg.filter_multi_output(audio_stream, 'asplit', 2)
+        else:
+            video_branches, audio_branches = [video_stream], [audio_stream]
+
+        # Full resolution: encoded once, muxed to the MP4 and the 'high' variant via tee
+        outputs = [ffmpeg.output(
+            video_branches[0], audio_branches[0], _tee_target(output_path, hls_dir, high),
+            f='tee', vcodec='libx264', acodec='aac', pix_fmt='yuv420p',
+            flags='+global_header', threads=main_threads, shortest=None,
+            **_keyframe_args()
+        )]
+        if len(renditions) == 2:
+            outputs.append(_hls_output(video_branches[1], audio_branches[1], hls_dir, low, low_threads))
+
+    out = ffmpeg.merge_outputs(*outputs)
     
     try:
-        out.run(cmd=Config.FFMPEG_PATH, overwrite_output=True, capture_stderr=True)
+        ffmpeg_runner.run(out, job_id=job_id, total_duration=total_duration, on_progress=on_progress)
     except ffmpeg.Error as e:
         error_log = e.stderr.decode() if e.stderr else str(e)
         print("FFmpeg Error:", error_log)
@@ -11,6 +11,12 @@ document.addEventListener('DOMContentLoaded', () => {
     const statusText = document.getElementById('status-text');
     const progressBar = document.getElementById('progress-bar');
     const downloadBtn = document.getElementById('download-btn');
+    const livePreview = document.getElementById('live-preview');
+
+    const cancelBtn = document.getElementById('cancel-btn');
+
+    let hlsPlayer = null;
+    let currentJobId = null;
 
     createBtn.addEventListener('click', async () => {
         const prompt = promptInput.value.trim();
@@ -39,6 +45,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
             const data = await response.json();
             const jobId = data.job_id;
+            currentJobId = jobId;
 
             // Poll Status
             pollStatus(jobId);
@@ -60,13 +67,21 @@ document.addEventListener('DOMContentLoaded', () => {
                 progressBar.style.width = `${job.progress}%`;
 
                 if (job.status === 'generating_script') statusText.innerText = "Writing Script...";
-                if (job.status === 'fetching_images') statusText.innerText = "Finding Perfect Images...";
+                if (job.status === 'fetching_media') statusText.innerText = "Finding Perfect Images...";
                 if (job.status === 'generating_audio') statusText.innerText = "Recording Voiceover...";
                 if (job.status === 'rendering_video') statusText.innerText = "Assembling Video...";
 
+                // Start watching the first segments while the rest are still rendering
+                if (job.hls_playlist && job.status === 'rendering_video' && !hlsPlayer) {
+                    startLivePreview(job.hls_playlist);
+                }
+
                 if (job.status === 'completed') {
                     clearInterval(interval);
                     showResult(jobId, job);
+                } else if (job.status === 'cancelled') {
+                    clearInterval(interval);
+                    resetUI();
                 } else if (job.status === 'failed') {
                     clearInterval(interval);
                     alert(`Error: ${job.error}`);
@@ -79,12 +94,68 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 1000); // Check every 1s
     }
 
+    cancelBtn.addEventListener('click', async () => {
+        if (!currentJobId) return;
+        statusText.innerText = "Cancelling...";
+        try {
+            await fetch(`/jobs/${currentJobId}`, { method: 'DELETE' });
+        } catch (e) {
+            console.error("Cancel error", e);
+        }
+    });
+
+    function startLivePreview(playlistUrl) {
+        const video = document.createElement('video');
+        video.controls = true;
+        video.muted = true;
+        video.playsInline = true;
+        livePreview.innerHTML = '';
+        livePreview.appendChild(video);
+        livePreview.classList.remove('hidden');
+
+        if (window.Hls && Hls.isSupported()) {
+            // Playlists appear a few seconds after rendering starts, so keep retrying.
+            // EVENT playlists look live to hls.js; startPosition 0 plays from the first segment
+            // instead of jumping to the live edge.
+            hlsPlayer = new Hls({
+                startPosition: 0,
+                manifestLoadingMaxRetry: 30,
+                manifestLoadingRetryDelay: 2000,
+                levelLoadingMaxRetry: 30,
+                levelLoadingRetryDelay: 2000
+            });
+            hlsPlayer.loadSource(playlistUrl);
+            hlsPlayer.attachMedia(video);
+            hlsPlayer.on(Hls.Events.MANIFEST_PARSED, () => video.play().catch(() => {}));
+        } else if (video.canPlayType('application/vnd.apple.mpegurl')) {
+            // Safari plays HLS natively
+            hlsPlayer = true;
+            video.addEventListener('loadedmetadata', () => { video.currentTime = 0; }, { once: true });
+            video.src = playlistUrl;
+            video.play().catch(() => {});
+        }
+    }
+
+    function stopLivePreview() {
+        if (hlsPlayer && hlsPlayer.destroy) hlsPlayer.destroy();
+        hlsPlayer = null;
+        livePreview.innerHTML = '';
+        livePreview.classList.add('hidden');
+    }
+
     function showResult(jobId, jobData) {
+        stopLivePreview();
         processingState.classList.add('hidden');
         resultArea.classList.remove('hidden');
 
         downloadBtn.href = `/download/${jobId}`;
 
+        // Inline Preview (served with Range support, so it can start before the full download)
+        const preview = resultArea.querySelector('.video-preview');
+        if (preview) {
+            preview.innerHTML = `<video src="/download/${jobId}?inline=1" controls preload="metadata" playsinline></video>`;
+        }
+
         // Thumbnail Button
         const thumbBtn = document.getElementById('download-thumb-btn');
         if (thumbBtn) {
@@ -102,6 +173,8 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     function resetUI() {
+        stopLivePreview();
+        currentJobId = null;
         creationForm.classList.remove('hidden');
         processingState.classList.add('hidden');
         resultArea.classList.add('hidden');
@@ -0,0 +1,121 @@
+import argparse
+import os
+import socket
+import threading
+import time
+from config import Config, ensure_directories
+from services import job_queue, ffmpeg_runner, asset_lifecycle, search_engine
+from services.pipeline import process_video_job, preload
+
+# Seconds to let job threads wind down on shutdown before releasing their jobs anyway
+SHUTDOWN_GRACE_SECONDS = 10
+
+# Jobs this process currently holds
+_claimed = set()
+_claimed_lock = threading.Lock()
+
+def _release(queue, job_id):
+    with _claimed_lock:
+        if job_id not in _claimed:
+            return
+        _claimed.discard(job_id)
+    try:
+        queue.release(job_id)
+        print(f"Released job {job_id} back to the queue")
+    except Exception as e:
+        print(f"Could not release job {job_id}: {e}")
+
+def _heartbeat(queue, job_id, stop):
+    # Keeps the lease alive during long stages and relays DELETE /jobs/<id> to ffmpeg
+    while not stop.wait(Config.JOB_HEARTBEAT_SECONDS):
+        try:
+            queue.update(job_id, {})
+            if queue.is_cancel_requested(job_id):
+                ffmpeg_runner.cancel(job_id)
+        except Exception as e:
+            print(f"Heartbeat failed for job {job_id}: {e}")
+
+def run_job(queue, job_id, payload):
+    state = job_queue.QueueJobState(queue, job_id, queue.get(job_id))
+    if queue.is_cancel_requested(job_id):
+        ffmpeg_runner.cancel(job_id)
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(queue, job_id, stop), daemon=True)
+    heartbeat.start()
+    try:
+        process_video_job(
+            job_id, payload['prompt'], payload['duration'], payload['voice_id'],
+            payload['orientation'], payload['mood'], state
+        )
+    finally:
+        stop.set()
+        if ffmpeg_runner.is_shutting_down():
+            # Interrupted, not finished: hand it straight to another worker
+            _release(queue, job_id)
+        else:
+            with _claimed_lock:
+                _claimed.discard(job_id)
+
+def worker_loop(queue, worker_id):
+    print(f"Worker {worker_id} waiting for jobs...")
+    while not ffmpeg_runner.is_shutting_down():
+        try:
+            claimed = queue.claim(worker_id)
+        except Exception as e:
+            print(f"Worker {worker_id} could not claim a job: {e}")
+            claimed = None
+
+        if not claimed:
+            time.sleep(Config.JOB_POLL_INTERVAL)
+            continue
+
+        job_id, payload = claimed
+        with _claimed_lock:
+            _claimed.add(job_id)
+        print(f"Worker {worker_id} claimed job {job_id}")
+        try:
+            run_job(queue, job_id, payload)
+        except Exception as e:
+            # e.g. the queue DB was locked; the lease expires and the job is reclaimed
+            print(f"Worker {worker_id} failed on job {job_id}: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Render worker: runs queued video jobs (RENDER_MODE=queue).")
+    parser.add_argument('--concurrency', type=int, default=1, help="Jobs this process runs at once")
+    args = parser.parse_args()
+
+    ensure_directories()
+    preload()
+    asset_lifecycle.start_background_gc()
+    search_engine.start_prefetch()
+
+    queue = job_queue.get_queue()
+    base_id = f"{socket.gethostname()}-{os.getpid()}"
+
+    threads = []
+    for i in range(args.concurrency):
+        thread = threading.Thread(target=worker_loop, args=(queue, f"{base_id}-{i}"), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    # SIGINT/SIGTERM (Ctrl-C, autoscaler scale-down) kill the ffmpeg trees first
+    ffmpeg_runner.install_signal_handlers()
+    try:
+        for thread in threads:
+            thread.join()
+    except (KeyboardInterrupt, SystemExit):
+        print("Worker stopping")
+        ffmpeg_runner.shutdown()
+
+        # Let interrupted jobs wind down, then release whatever is still held
+        deadline = time.time() + SHUTDOWN_GRACE_SECONDS
+        for thread in threads:
+            thread.join(timeout=max(0, deadline - time.time()))
+        with _claimed_lock:
+            remaining = list(_claimed)
+        for job_id in remaining:
+            _release(queue, job_id)
+
+if __name__ == '__main__':
+    main()